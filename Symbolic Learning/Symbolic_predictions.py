@@ -327,7 +327,7 @@ if __name__ == '__main__':
 
         # Transform results
         print("\nTransforming results...")
-        transform(enriched_kg, kg)
+        transform(enriched_kg, kg, constraints)
 
         # Print execution time
         end_time = time.time()
@@ -126,20 +126,23 @@ def transform_triple(triple: Tuple[URIRef, URIRef, URIRef],
     return None
 
 
-def transform(enriched_kg: Graph, kg_name: str) -> Graph:
+def transform(enriched_kg: Graph, kg_name: str, constraints: Optional[str] = None) -> Graph:
     """Main transformation function"""
     try:
         print(f"\nStarting transformation process for {kg_name}...")
 
-        constraints_dir = f"Constraints/{kg_name}/result_{kg_name}"
-        shapes_file = f"Constraints/{kg_name}/{kg_name}.ttl"
+        constraints = constraints or f"Constraints/{kg_name}"
+        constraints_dir = f"{constraints}/result_{kg_name}"
+        shapes_files = [os.path.join(constraints, f) for f in sorted(os.listdir(constraints)) if f.endswith('.ttl')]
         violation_report = f"{constraints_dir}/validationReport.ttl"
         output_dir = f"./Transformed_{kg_name}"
         os.makedirs(output_dir, exist_ok=True)
         output_file = f"{output_dir}/TransformedKG_{kg_name}.nt"
 
         print("Processing SHACL constraints...")
-        constraint_patterns = process_shacl_shapes(shapes_file)
+        constraint_patterns = {}
+        for shapes_file in shapes_files:
+            constraint_patterns.update(process_shacl_shapes(shapes_file))
         print(f"Found patterns for {len(constraint_patterns)} shapes")
 
         print("Processing validation report...")
@@ -0,0 +1,283 @@
+"""
+Resumable pipeline runner: enrichment -> validation -> transformation -> KGE
+
+Every stage is keyed by the hash of its configuration, its input files and the
+keys of the stages it depends on. Completed stages are stored under
+CACHE_DIR/<stage>/<key>/ and are restored instead of re-executed when the key
+is unchanged. A stage only counts as completed once its manifest is written, so
+an interrupted run resumes from the last completed stage.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from rdflib import Graph
+from Symbolic_predictions import initialize, process_rules
+from validation import travshacl
+from Transformation import transform
+
+CACHE_DIR = '.pipeline_cache'
+CACHE_KEEP = 2  # cache entries kept per stage, the most recently used first
+MAX_WORKERS = 4
+KGE_EPOCHS = 100  # same number of epochs as KGE/kge_vise.py
+
+
+class Stage:
+    def __init__(self, name, run, outputs, inputs=(), config=None, depends_on=()):
+        self.name = name
+        self.run = run
+        self.outputs = list(outputs)
+        self.inputs = list(inputs)
+        self.config = config or {}
+        self.depends_on = list(depends_on)
+
+
+def hash_path(path, digest=None):
+    """Hash the content of a file or, recursively, of a directory"""
+    digest = digest or hashlib.sha256()
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for file in sorted(files):
+                file_path = os.path.join(root, file)
+                digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+                hash_path(file_path, digest)
+    else:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest
+
+
+def stage_key(stage, keys):
+    """Content address of a stage: its config, its input files and the keys of its dependencies"""
+    digest = hashlib.sha256()
+    digest.update(stage.name.encode('utf-8'))
+    digest.update(json.dumps(stage.config, sort_keys=True).encode('utf-8'))
+    for path in stage.inputs:
+        digest.update(path.encode('utf-8'))
+        digest.update(hash_path(path).digest())
+    for dependency in stage.depends_on:
+        digest.update(keys[dependency].encode('utf-8'))
+    return digest.hexdigest()
+
+
+def copy_path(source, destination):
+    if os.path.isdir(destination):
+        shutil.rmtree(destination)
+    if os.path.isdir(source):
+        shutil.copytree(source, destination)
+    else:
+        os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+        shutil.copy2(source, destination)
+
+
+def clear_outputs(stage):
+    """Remove outputs left by earlier runs so that a new cache entry only holds what the stage produces"""
+    for path in stage.outputs:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def restore_outputs(stage, stage_dir, manifest):
+    """Copy cached outputs back to their working location unless they are already up to date"""
+    for i, path in enumerate(stage.outputs):
+        if os.path.exists(path) and hash_path(path).hexdigest() == manifest['outputs'][path]:
+            continue
+        print(f"[{stage.name}] Restoring {path} from cache")
+        copy_path(os.path.join(stage_dir, str(i)), path)
+
+
+def store_outputs(stage, stage_dir):
+    """Snapshot the outputs of a stage and mark it as completed by writing its manifest last"""
+    tmp_dir = stage_dir + '.tmp'
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    outputs = {}
+    for i, path in enumerate(stage.outputs):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Stage '{stage.name}' did not produce {path}")
+        copy_path(path, os.path.join(tmp_dir, str(i)))
+        outputs[path] = hash_path(path).hexdigest()
+
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump({'stage': stage.name, 'config': stage.config, 'outputs': outputs}, f, indent=2)
+    if os.path.exists(stage_dir):
+        shutil.rmtree(stage_dir)
+    os.replace(tmp_dir, stage_dir)
+
+
+def prune_cache(stage):
+    """Drop all but the CACHE_KEEP most recently used cache entries of a stage"""
+    stage_cache = os.path.join(CACHE_DIR, stage.name)
+    entries = [os.path.join(stage_cache, entry) for entry in os.listdir(stage_cache)]
+    completed = [entry for entry in entries if os.path.exists(os.path.join(entry, 'manifest.json'))]
+    completed.sort(key=lambda entry: os.path.getmtime(os.path.join(entry, 'manifest.json')), reverse=True)
+    for entry in completed[CACHE_KEEP:] + [entry for entry in entries if entry.endswith('.tmp')]:
+        shutil.rmtree(entry)
+
+
+def execute_stage(stage, key):
+    """Run a single stage, or restore it from the cache if its key is unchanged"""
+    stage_dir = os.path.join(CACHE_DIR, stage.name, key)
+    manifest_file = os.path.join(stage_dir, 'manifest.json')
+
+    if os.path.exists(manifest_file):
+        print(f"[{stage.name}] Unchanged (key {key[:12]}), skipping")
+        with open(manifest_file, 'r') as f:
+            restore_outputs(stage, stage_dir, json.load(f))
+        os.utime(manifest_file)
+        return
+
+    print(f"[{stage.name}] Running (key {key[:12]})")
+    start_time = time.time()
+    clear_outputs(stage)
+    stage.run()
+    store_outputs(stage, stage_dir)
+    prune_cache(stage)
+    print(f"[{stage.name}] Completed in {time.time() - start_time:.2f} seconds")
+
+
+def run_pipeline(stages, max_workers=MAX_WORKERS):
+    """Execute the stages in dependency order, running independent stages in parallel"""
+    stages = {stage.name: stage for stage in stages}
+    keys = {}
+    pending = dict(stages)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if all(dependency in keys for dependency in stage.depends_on):
+                    key = stage_key(stage, keys)
+                    running[executor.submit(execute_stage, stage, key)] = (name, key)
+                    del pending[name]
+
+            if not running:
+                raise ValueError(f"Unresolvable stage dependencies: {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, key = running.pop(future)
+                future.result()
+                keys[name] = key
+
+    return keys
+
+
+def load_nt(file):
+    g = Graph()
+    g.parse(file, format='nt')
+    return g
+
+
+def local_name(term):
+    return str(term).rstrip('/').split('#')[-1].split('/')[-1]
+
+
+def train_kge(kg_file, m, n_epoch, results_path, num_threads):
+    """Train one KGE model exactly as KGE/kge_vise.py does; runs in its own process"""
+    import torch
+    kge_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'KGE')
+    sys.path.insert(0, kge_dir)
+    from kge_vise import load_dataset, create_model, plotting
+
+    # Models trained side by side share the cores instead of each using all of them
+    torch.set_num_threads(num_threads)
+    tf, triple_data, entity_label, relation_label = load_dataset(kg_file)
+    training, testing = tf.split(random_state=1234)
+    model, result = create_model(tf_training=training, tf_testing=testing, embedding=m,
+                                 n_epoch=n_epoch, path=results_path)
+    plotting(result, m, results_path)
+
+
+def build_stages(input_config):
+    """Model enrichment, validation, transformation and KGE as a DAG of stages"""
+    prefix, rulesfile, rdf_data, path, predictions_folder, constraints, kg = initialize(input_config)
+    with open(input_config, "r") as input_file_descriptor:
+        input_data = json.load(input_file_descriptor)
+
+    enriched_kg_path = os.path.join(os.path.dirname(predictions_folder), f"{kg}_EnrichedKG", f"{kg}_Enriched_KG.nt")
+    shapes_files = [os.path.join(constraints, file) for file in sorted(os.listdir(constraints))
+                    if file.endswith('.ttl')]
+    validation_output = os.path.join(constraints, 'result_' + kg)
+    transformed_kg_path = os.path.join(f"Transformed_{kg}", f"TransformedKG_{kg}.nt")
+    transformed_tsv_path = os.path.join(f"Transformed_{kg}", f"TransformedKG_{kg}.tsv")
+
+    def enrichment():
+        result_df, enriched_kg = process_rules(rulesfile, prefix, rdf_data, predictions_folder, kg)
+        # process_rules writes nothing when no rule yields predictions; the run continues with
+        # the (empty) graph it returns, as in Symbolic_predictions.py
+        os.makedirs(predictions_folder, exist_ok=True)
+        if not os.path.exists(enriched_kg_path):
+            os.makedirs(os.path.dirname(enriched_kg_path), exist_ok=True)
+            enriched_kg.serialize(destination=enriched_kg_path, format='nt')
+
+    def validation():
+        travshacl(load_nt(enriched_kg_path), constraints, kg)
+
+    def transformation():
+        transformed_kg = transform(load_nt(enriched_kg_path), kg, constraints)
+        with open(transformed_tsv_path, 'w', encoding='utf-8') as f:
+            for s, p, o in transformed_kg:
+                f.write(f"{local_name(s)}\t{local_name(p)}\t{local_name(o)}\n")
+
+    stages = [
+        Stage('enrichment', enrichment,
+              outputs=[predictions_folder, enriched_kg_path],
+              inputs=[rulesfile, rdf_data],
+              config={'KG': kg, 'prefix': prefix}),
+        Stage('validation', validation,
+              outputs=[validation_output],
+              inputs=shapes_files,
+              config={'KG': kg, 'constraints_folder': constraints},
+              depends_on=['enrichment']),
+        Stage('transformation', transformation,
+              outputs=[transformed_kg_path, transformed_tsv_path],
+              inputs=shapes_files,
+              config={'KG': kg},
+              depends_on=['validation']),
+    ]
+
+    # Every KGE model only depends on the transformed KG, hence they are trained in parallel.
+    # pykeen reseeds the process-global RNGs, so each model is trained in a separate process
+    # to keep the results identical to a sequential run of KGE/kge_vise.py.
+    results_path = input_data.get('path_to_results', f"../KGE/Results/VISE_{kg}/")
+    models = input_data.get('model', [])
+    num_threads = max(1, (os.cpu_count() or 1) // max(1, min(MAX_WORKERS, len(models))))
+    for m in models:
+        def kge(m=m):
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                executor.submit(train_kge, transformed_tsv_path, m, KGE_EPOCHS, results_path, num_threads).result()
+
+        stages.append(Stage(f'kge_{m}', kge,
+                            outputs=[os.path.join(results_path, m)],
+                            config={'model': m, 'n_epoch': KGE_EPOCHS, 'path_to_results': results_path},
+                            depends_on=['transformation']))
+
+    return stages
+
+
+if __name__ == '__main__':
+    try:
+        start_time = time.time()
+        print("Starting VISE pipeline...")
+
+        input_config = 'input.json'
+        run_pipeline(build_stages(input_config))
+
+        end_time = time.time()
+        print(f"\nTotal execution time: {end_time - start_time:.2f} seconds")
+        print("Process completed successfully!")
+
+    except Exception as e:
+        print(f"\nError occurred during execution: {str(e)}")
+        raise